@@ -9,97 +9,285 @@ Design:
 This is a lightweight orchestration compatible with adding the Strands
 Agents SDK later; the code tries to keep the agent boundary explicit.
 """
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import os
+import re
 import json
+import asyncio
 import logging
+from functools import lru_cache
+from contextlib import asynccontextmanager
 import httpx
 
 from tools.math_tool import evaluate_expression
+from util._json import loads, dumps
 
 logger = logging.getLogger(__name__)
 
+_SYSTEM_PROMPT = (
+    "You are an assistant that can either answer directly or request to run "
+    "a tool. When requesting a tool, reply ONLY with a JSON object exactly in one of the formats:\n"
+    "1) {\"response\": \"...\"}  OR\n"
+    "2) {\"tool\": {\"name\": \"math\", \"input\": \"2+2\"}}\n"
+    "Do not add any other text. The math tool evaluates arithmetic expressions "
+    "and Python `math` functions (e.g., sin, cos)."
+)
+# Shared by every conversation; never mutated (run() only appends new dicts)
+_SYSTEM_MSG = {"role": "system", "content": _SYSTEM_PROMPT}
+
+# Seconds the cold probe waits on an endpoint before also trying the next one
+_PROBE_HEDGE_DELAY = 2.0
+
+# Patterns used by the math heuristics, compiled once at import.
+_MATH_TRIGGERS = frozenset(("quanto é", "quanto", "calcule", "calcular", "raiz quadrada", "sqrt"))
+# input made only of these characters (e.g. "2+2") skips the word checks
+_ARITH_CHARS = frozenset("0123456789+-*/%^(). ")
+_RE_LOOKS_OP = re.compile(r"\d+\s*[\+\-\*\/\%\^]")
+_RE_LOOKS_WORD = re.compile(r"\d+\s*(mais|menos|vezes|dividido|por|x)\s*\d+")
+_RE_RAIZ1 = re.compile(r"raiz\s+quadrada\s+de\s*([0-9A-Za-z_\.\(\)\+\-\*\/\%\^\s]+)")
+_RE_RAIZ2 = re.compile(r"raiz\s+de\s*([0-9A-Za-z_\.\(\)\+\-\*\/\%\^\s]+)")
+# Portuguese operator words, replaced in a single regex pass. 'por' alone is
+# ambiguous but commonly used as division in 'dividido por'.
+_PT_OPS = {"mais": "+", "menos": "-", "vezes": "*", "x": "*", "dividido por": "/", "dividido": "/"}
+_PT_OPS_RE = re.compile(r"\b(dividido\s+por|mais|menos|vezes|dividido|x)\b")
+_RE_TOKENS = re.compile(r"[0-9A-Za-z_\.\(\)\+\-\*\/\%\^]+")
+_RE_DIGIT = re.compile(r"\d")
+_RE_OPS_ONLY = re.compile(r"[\+\-\*\/\%\^]+")
+_RE_PARENS_ONLY = re.compile(r"[\(\)]+")
+_EXTRACT_FUNCS = frozenset(('sin', 'cos', 'tan', 'sqrt', 'log', 'exp', 'abs', 'floor', 'ceil', 'pow'))
+
+
+def _pt_op(m: "re.Match[str]") -> str:
+    # collapse any whitespace inside 'dividido   por' before the lookup
+    return _PT_OPS[" ".join(m.group(1).split())]
+
+
+def _format_prompt(messages: List[Dict[str, str]]) -> str:
+    """Flatten chat messages into a single `role: content` prompt string."""
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+# Pure function of the input text, so results are memoized.
+@lru_cache(maxsize=1024)
+def _extract_expression(text: str) -> str:
+    """Try to extract a math expression from the user's text.
+
+    Very small heuristic: return digits/operators substring, otherwise return original text.
+    """
+    # normalize and work with lowercase for pattern matching
+    t = text.replace(',', '')
+    t = t.replace('\u00A0', ' ')
+    tl = t.lower()
+
+    # Handle Portuguese phrase "raiz quadrada de X" -> sqrt(X)
+    m = _RE_RAIZ1.search(tl)
+    if m:
+        inner = m.group(1).strip()
+        inner = inner.replace('^', '**')
+        return f"sqrt({inner})"
+
+    # Handle shorter form "raiz de X" -> sqrt(X)
+    m2 = _RE_RAIZ2.search(tl)
+    if m2:
+        inner = m2.group(1).strip()
+        inner = inner.replace('^', '**')
+        return f"sqrt({inner})"
+
+    # Translate Portuguese operator words into symbols before tokenizing
+    # e.g. '5 mais 5' -> '5 + 5', '10 dividido por 2' -> '10 / 2'
+    t = _PT_OPS_RE.sub(_pt_op, t)
+
+    # extract allowed tokens (digits, operators, parentheses, dots and func names)
+    parts = _RE_TOKENS.findall(t)
+    if parts:
+        filtered = []
+        for p in parts:
+            pl = p.lower()
+            if _RE_DIGIT.search(p):
+                filtered.append(p)
+                continue
+            if pl in _EXTRACT_FUNCS:
+                filtered.append(pl)
+                continue
+            if _RE_OPS_ONLY.fullmatch(p):
+                filtered.append(p)
+                continue
+            if _RE_PARENS_ONLY.fullmatch(p):
+                filtered.append(p)
+                continue
+        if filtered:
+            expr = " ".join(filtered)
+            expr = expr.replace('^', '**')
+            expr = expr.strip()
+            return expr
+    return text
+
 
 class Agent:
-    def __init__(self, ollama_url: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        ollama_url: Optional[str] = None,
+        model: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.ollama_url = ollama_url or os.environ.get("OLLAMA_URL", "http://localhost:11434")
         self.model = model or os.environ.get("OLLAMA_MODEL", "mistral")
-
-    async def _call_llm(self, messages: List[Dict[str, str]]) -> str:
-        """Call Ollama (or compatible) HTTP chat endpoint.
-
-        The implementation assumes an OpenAI-like `/v1/chat/completions` API
-        which some local deployments (or proxies) provide. If your Ollama
-        exposes a different API, adjust this function accordingly.
-        """
+        # Reuse a long-lived client so keep-alive connections are pooled
+        # across LLM calls. The API passes its shared client; without one,
+        # each call opens (and closes) its own, as a standalone Agent may be
+        # used from several event loops.
+        self.client = client
+        # (url, kind) of the first endpoint that answered successfully
+        self._endpoint_cache: Optional[Tuple[str, str]] = None
+        self._probe_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _http(self) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the shared client, or a per-call client when none was given."""
+        if self.client is not None:
+            yield self.client
+        else:
+            async with httpx.AsyncClient(timeout=30) as client:
+                yield client
+
+    def _endpoints(self) -> List[Tuple[str, str]]:
         # Try multiple common endpoints/payloads so this works with
         # OpenAI-like proxies and Ollama-native HTTP APIs.
-        endpoints = [
+        return [
             (f"{self.ollama_url}/v1/chat/completions", "openai_chat"),
             (f"{self.ollama_url}/v1/completions", "openai_comp"),
             (f"{self.ollama_url}/chat", "ollama_chat"),
             (f"{self.ollama_url}/api/generate", "ollama_generate"),
         ]
 
+    async def _try_endpoint(self, url: str, kind: str, messages: List[Dict[str, str]]) -> str:
+        """POST `messages` to a single endpoint and extract the reply text.
+
+        Raises on transport errors and non-success status codes.
+        """
+        if kind == "openai_chat":
+            payload = {"model": self.model, "messages": messages, "max_tokens": 512}
+        elif kind == "openai_comp":
+            # some proxies expect a single prompt string
+            prompt = _format_prompt(messages)
+            payload = {"model": self.model, "prompt": prompt, "max_tokens": 512}
+        elif kind == "ollama_chat":
+            # try a simple chat-like payload
+            payload = {"model": self.model, "messages": messages}
+        else:  # ollama_generate
+            # Ollama native `/api/generate` often expects `model` and `prompt`
+            prompt = _format_prompt(messages)
+            payload = {"model": self.model, "prompt": prompt}
+        async with self._http() as client:
+            r = await client.post(url, json=payload)
+
+        if r.status_code >= 400:
+            # only decode the head of the body; error pages can be large
+            raise RuntimeError(f"{r.status_code} from {url}: {r.content[:200].decode(errors='replace')}")
+
+        # orjson parses the raw bytes directly (no intermediate str decode)
+        data = loads(r.content)
+
+        # OpenAI-like response
+        if isinstance(data, dict) and "choices" in data and len(data["choices"]) > 0:
+            choice = data["choices"][0]
+            # chat format
+            if "message" in choice and "content" in choice["message"]:
+                return choice["message"]["content"]
+            # completion-like
+            if "text" in choice:
+                return choice["text"]
+
+        # Ollama-style: look for common keys
+        if isinstance(data, dict):
+            if "text" in data and isinstance(data["text"], str):
+                return data["text"]
+            if "output" in data:
+                return data["output"]
+            # some Ollama responses embed results in `result` or `choices`
+            if "result" in data:
+                return dumps(data["result"])
+
+        # fallback: if response body is simple string
+        if isinstance(data, str):
+            return data
+
+        # otherwise return the full JSON as string
+        return dumps(data)
+
+    async def _call_llm(self, messages: List[Dict[str, str]]) -> str:
+        """Call Ollama (or compatible) HTTP chat endpoint.
+
+        The first endpoint that answers successfully is remembered, so in
+        steady state each call sends exactly one request. The probe over the
+        candidate endpoints (in preference order, hedged when one is slow)
+        only runs on the first call or after the cached endpoint starts
+        failing.
+        """
         last_exc: Optional[Exception] = None
-        async with httpx.AsyncClient(timeout=30) as client:
-            for url, kind in endpoints:
-                try:
-                    if kind == "openai_chat":
-                        payload = {"model": self.model, "messages": messages, "max_tokens": 512}
-                        r = await client.post(url, json=payload)
-                    elif kind == "openai_comp":
-                        # some proxies expect a single prompt string
-                        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                        payload = {"model": self.model, "prompt": prompt, "max_tokens": 512}
-                        r = await client.post(url, json=payload)
-                    elif kind == "ollama_chat":
-                        # try a simple chat-like payload
-                        payload = {"model": self.model, "messages": messages}
-                        r = await client.post(url, json=payload)
-                    else:  # ollama_generate
-                        # Ollama native `/api/generate` often expects `model` and `prompt`
-                        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-                        payload = {"model": self.model, "prompt": prompt}
-                        r = await client.post(url, json=payload)
-
-                    # If non-success, try next endpoint
-                    if r.status_code >= 400:
-                        last_exc = RuntimeError(f"{r.status_code} from {url}: {r.text}")
-                        continue
-
-                    data = r.json()
-
-                    # OpenAI-like response
-                    if isinstance(data, dict) and "choices" in data and len(data["choices"]) > 0:
-                        choice = data["choices"][0]
-                        # chat format
-                        if "message" in choice and "content" in choice["message"]:
-                            return choice["message"]["content"]
-                        # completion-like
-                        if "text" in choice:
-                            return choice["text"]
-
-                    # Ollama-style: look for common keys
-                    if isinstance(data, dict):
-                        if "text" in data and isinstance(data["text"], str):
-                            return data["text"]
-                        if "output" in data:
-                            return data["output"]
-                        # some Ollama responses embed results in `result` or `choices`
-                        if "result" in data:
-                            return json.dumps(data["result"])
-
-                    # fallback: if response body is simple string
-                    if isinstance(data, str):
-                        return data
-
-                    # otherwise return the full JSON as string
-                    return json.dumps(data)
 
+        cached = self._endpoint_cache
+        if cached is not None:
+            try:
+                return await self._try_endpoint(*cached, messages)
+            except Exception as e:
+                last_exc = e
+
+        # Serialize probing so concurrent first requests don't all probe
+        async with self._probe_lock:
+            # another request may have found a working endpoint meanwhile
+            if self._endpoint_cache is not None and self._endpoint_cache != cached:
+                try:
+                    return await self._try_endpoint(*self._endpoint_cache, messages)
                 except Exception as e:
                     last_exc = e
-                    continue
+
+            self._endpoint_cache = None
+            # Cold path: try the candidate endpoints in preference order. The
+            # next one is started when the previous fails, or hedged after
+            # _PROBE_HEDGE_DELAY if it is slow to answer; a success is only
+            # accepted once every higher-priority endpoint has failed.
+            endpoints = self._endpoints()
+            tasks: List[asyncio.Task] = []
+            pending: set = set()
+            best: Optional[int] = None  # index of the preferred success so far
+            try:
+                while True:
+                    if best is None and len(tasks) < len(endpoints):
+                        url, kind = endpoints[len(tasks)]
+                        task = asyncio.create_task(self._try_endpoint(url, kind, messages))
+                        tasks.append(task)
+                        pending.add(task)
+                    if not pending:
+                        break
+                    more = best is None and len(tasks) < len(endpoints)
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=_PROBE_HEDGE_DELAY if more else None,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    # retrieve every finished task's outcome
+                    for task in done:
+                        idx = tasks.index(task)
+                        exc = task.exception()
+                        if exc is not None:
+                            last_exc = exc
+                        elif best is None or idx < best:
+                            best = idx
+                    if best is not None:
+                        # lower-priority endpoints can no longer win
+                        for task in tasks[best + 1:]:
+                            task.cancel()
+                        pending = {task for task in pending if tasks.index(task) < best}
+                        if not pending:
+                            self._endpoint_cache = endpoints[best]
+                            return tasks[best].result()
+            finally:
+                for task in tasks:
+                    if task.done() and not task.cancelled():
+                        task.exception()  # mark as retrieved
+                    else:
+                        task.cancel()
 
         # If none of the endpoints worked, raise the last exception
         raise last_exc or RuntimeError("No viable LLM endpoint responded")
@@ -109,15 +297,6 @@ class Agent:
 
         Returns a dict: {"ok": True, "response": "text"} or {"ok": False, "error": "msg"}
         """
-        system_prompt = (
-            "You are an assistant that can either answer directly or request to run "
-            "a tool. When requesting a tool, reply ONLY with a JSON object exactly in one of the formats:\n"
-            "1) {\"response\": \"...\"}  OR\n"
-            "2) {\"tool\": {\"name\": \"math\", \"input\": \"2+2\"}}\n"
-            "Do not add any other text. The math tool evaluates arithmetic expressions "
-            "and Python `math` functions (e.g., sin, cos)."
-        )
-
         # Quick heuristic: if the user input appears to be a direct math request,
         # evaluate it locally with the math tool instead of relying on the LLM.
         if self._looks_like_math(user_input):
@@ -127,10 +306,7 @@ class Agent:
             else:
                 return {"ok": False, "error": tool_result.get("error")}
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_input},
-        ]
+        messages = [_SYSTEM_MSG, {"role": "user", "content": user_input}]
 
         for step in range(max_steps):
             try:
@@ -139,7 +315,9 @@ class Agent:
                 logger.exception("LLM call failed")
                 return {"ok": False, "error": f"LLM call failed: {e}"}
 
-            # attempt to parse JSON from model output
+            # attempt to parse JSON from model output. The stdlib json is used
+            # for model output and tool results: they may carry integers beyond
+            # 64 bits or NaN/inf, which orjson can't round-trip.
             try:
                 parsed = json.loads(llm_out.strip())
             except Exception:
@@ -167,85 +345,67 @@ class Agent:
             # fallback: if parsing produced something else, return it as JSON string
             return {"ok": True, "response": json.dumps(parsed)}
 
+    async def _stream_llm(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Stream a completion from Ollama's `/api/generate`, yielding text chunks.
+
+        Ollama streams one JSON object per line; each carries the next piece
+        of the answer in `response` and the last one has `done: true`.
+        """
+        url = f"{self.ollama_url}/api/generate"
+        prompt = _format_prompt(messages)
+        payload = {"model": self.model, "prompt": prompt, "stream": True}
+        async with self._http() as client, client.stream("POST", url, json=payload) as r:
+            if r.status_code >= 400:
+                body = await r.aread()
+                raise RuntimeError(f"{r.status_code} from {url}: {body[:200].decode(errors='replace')}")
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                chunk = loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                token = chunk.get("response")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+
+    async def stream(self, user_input: str) -> AsyncIterator[str]:
+        """Stream the answer to `user_input` as text chunks.
+
+        Math requests are answered locally in a single chunk. Anything else is
+        streamed from the LLM as plain text (no tool-call protocol). Raises on
+        errors.
+        """
+        if self._looks_like_math(user_input):
+            tool_result = evaluate_expression(self._extract_expression(user_input))
+            if not tool_result.get("ok"):
+                raise RuntimeError(tool_result.get("error"))
+            yield str(tool_result.get("result"))
+            return
+
+        async for token in self._stream_llm([{"role": "user", "content": user_input}]):
+            yield token
+
     def _looks_like_math(self, text: str) -> bool:
         """Heuristic to detect if the user asked for a math computation."""
-        import re
+        # fast path: with only digits/operators/parentheses neither the
+        # triggers nor the word operators can match, so skip straight to
+        # the digit-then-operator check
+        if set(text) <= _ARITH_CHARS:
+            return _RE_LOOKS_OP.search(text) is not None
         t = text.lower()
         # common Portuguese triggers and presence of digits/operators
-        if any(k in t for k in ("quanto é", "quanto", "calcule", "calcular", "raiz quadrada", "sqrt")):
+        if any(k in t for k in _MATH_TRIGGERS):
             return True
         # simple expression detection: digits with operators or Portuguese words
-        if re.search(r"\d+\s*[\+\-\*\/\%\^]", text):
+        if _RE_LOOKS_OP.search(text):
             return True
         # detection for Portuguese operator words (e.g., '5 mais 5', '5 vezes 5')
-        if re.search(r"\d+\s*(mais|menos|vezes|dividido|por|x)\s*\d+", t):
+        if _RE_LOOKS_WORD.search(t):
             return True
         return False
 
     def _extract_expression(self, text: str) -> str:
-        """Try to extract a math expression from the user's text.
-
-        Very small heuristic: return digits/operators substring, otherwise return original text.
-        """
-        import re
-        # normalize and work with lowercase for pattern matching
-        t = text.replace(',', '')
-        t = t.replace('\u00A0', ' ')
-        tl = t.lower()
-
-        # Handle Portuguese phrase "raiz quadrada de X" -> sqrt(X)
-        m = re.search(r"raiz\s+quadrada\s+de\s*([0-9A-Za-z_\.\(\)\+\-\*\/\%\^\s]+)", tl)
-        if m:
-            inner = m.group(1).strip()
-            inner = inner.replace('^', '**')
-            return f"sqrt({inner})"
-
-        # Handle shorter form "raiz de X" -> sqrt(X)
-        m2 = re.search(r"raiz\s+de\s*([0-9A-Za-z_\.\(\)\+\-\*\/\%\^\s]+)", tl)
-        if m2:
-            inner = m2.group(1).strip()
-            inner = inner.replace('^', '**')
-            return f"sqrt({inner})"
-
-        # Translate Portuguese operator words into symbols before tokenizing
-        # e.g. '5 mais 5' -> '5 + 5', '10 dividido por 2' -> '10 / 2'
-        replacements = [
-            (r"\bmais\b", "+"),
-            (r"\bmenos\b", "-"),
-            (r"\bvezes\b", "*"),
-            (r"\bx\b", "*"),
-            (r"\bdividido\s+por\b", "/"),
-            (r"\bdividido\b", "/"),
-            # 'por' is ambiguous but commonly used as division in 'dividido por'
-        ]
-        for pat, sub in replacements:
-            tl = re.sub(pat, sub, tl)
-            t = re.sub(pat, sub, t)
-
-        # extract allowed tokens (digits, operators, parentheses, dots and func names)
-        parts = re.findall(r"[0-9A-Za-z_\.\(\)\+\-\*\/\%\^]+", t)
-        if parts:
-            allowed_funcs = {
-                'sin', 'cos', 'tan', 'sqrt', 'log', 'exp', 'abs', 'floor', 'ceil', 'pow'
-            }
-            filtered = []
-            for p in parts:
-                pl = p.lower()
-                if re.search(r"\d", p):
-                    filtered.append(p)
-                    continue
-                if pl in allowed_funcs:
-                    filtered.append(pl)
-                    continue
-                if re.fullmatch(r"[\+\-\*\/\%\^]+", p):
-                    filtered.append(p)
-                    continue
-                if re.fullmatch(r"[\(\)]+", p):
-                    filtered.append(p)
-                    continue
-            if filtered:
-                expr = " ".join(filtered)
-                expr = expr.replace('^', '**')
-                expr = expr.strip()
-                return expr
-        return text
+        """Try to extract a math expression from the user's text."""
+        return _extract_expression(text)
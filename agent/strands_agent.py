@@ -9,56 +9,77 @@ Note: the Strands Agents SDK API surface may differ; this adapter attempts a
 best-effort integration. If you have the official SDK, update this file to
 use the correct SDK classes and registration calls.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import os
-import json
+import asyncio
+import inspect
+import importlib
 import logging
+import httpx
 
 logger = logging.getLogger(__name__)
 
-import importlib
-
 # Allow selecting the SDK package name via env var `STRANDS_SDK_PACKAGE`.
 # If not set, try a list of common candidate package names. If none are
 # present, we fall back to the internal `Agent` implementation.
-_SDK_CANDIDATES = [
-    os.environ.get("STRANDS_SDK_PACKAGE", ""),
+_SDK_CANDIDATES = (
     "strands_agents_sdk",
     "strands",
     "strands_agents",
-]
-
-sas = None
-_HAS_SAS = False
-for pkg in _SDK_CANDIDATES:
-    if not pkg:
-        continue
-    try:
-        sas = importlib.import_module(pkg)
-        _HAS_SAS = True
-        logger.info("Imported Strands SDK module: %s", pkg)
-        break
-    except Exception:
-        sas = None
-        _HAS_SAS = False
-        continue
+)
+
+# Memoized `_get_sdk` results, keyed by the tuple of probed package names
+_sdk_cache: Dict[Tuple[str, ...], Any] = {}
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "false").lower() in ("1", "true", "yes")
+
+
+def _get_sdk() -> Any:
+    """Import and return the first available Strands SDK module, or None.
+
+    Discovery is deferred until an agent actually asks for the SDK, so
+    importing this module (e.g. with `MOCK_AGENT=1`) doesn't probe packages.
+    """
+    candidates = tuple(p for p in (os.environ.get("STRANDS_SDK_PACKAGE", ""),) + _SDK_CANDIDATES if p)
+    if candidates in _sdk_cache:
+        return _sdk_cache[candidates]
+
+    sdk = None
+    for pkg in candidates:
+        try:
+            sdk = importlib.import_module(pkg)
+            logger.info("Imported Strands SDK module: %s", pkg)
+            break
+        except Exception:
+            continue
+    _sdk_cache[candidates] = sdk
+    return sdk
+
 
 from .agent import Agent as SimpleAgent  # fallback agent implemented earlier
 
 
 class StrandsAgent:
-    def __init__(self, ollama_url: Optional[str] = None, model: Optional[str] = None):
+    def __init__(
+        self,
+        ollama_url: Optional[str] = None,
+        model: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.ollama_url = ollama_url or os.environ.get("OLLAMA_URL", "http://localhost:11434")
         self.model = model or os.environ.get("OLLAMA_MODEL", "mistral")
 
         # Allow opting out of the Strands SDK even if installed. This is
         # useful for local testing with Ollama or when you prefer the
         # internal fallback agent. Set `STRANDS_USE_SDK=1` to force SDK usage.
-        use_sdk_flag = os.environ.get("STRANDS_USE_SDK", "false").lower()
-        if use_sdk_flag not in ("1", "true", "yes"):
-            _HAS_SAS = False
+        self._use_sdk = _env_flag("STRANDS_USE_SDK")
+        # MOCK_AGENT forces the local fallback; resolved once, not per request
+        self._mock = _env_flag("MOCK_AGENT")
+        sas = _get_sdk() if self._use_sdk else None
 
-        if _HAS_SAS and sas is not None:
+        if sas is not None:
             logger.info("Strands Agents SDK detected — attempting to initialize")
             # Try some common initialization patterns for SDKs. Real SDKs vary
             # widely; the best approach is to set `STRANDS_SDK_PACKAGE` to the
@@ -91,12 +112,39 @@ class StrandsAgent:
                 self.sdk = None
                 self.available = False
         else:
-            logger.info("Strands Agents SDK not installed — using fallback agent")
+            logger.info("Strands Agents SDK not enabled or not installed — using fallback agent")
             self.sdk = None
             self.available = False
 
+        # Resolve how to invoke the SDK once, instead of on every request
+        self._sdk_entry = self._resolve_sdk_entry() if self.available and self.sdk is not None else None
+
         # fallback to simple agent logic
-        self._fallback = SimpleAgent(self.ollama_url, self.model)
+        self._fallback = SimpleAgent(self.ollama_url, self.model, client=client)
+
+    def _resolve_sdk_entry(self) -> Optional[Tuple[Callable[..., Any], bool, bool]]:
+        """Pick the SDK invocation pattern: (fn, takes_messages, is_async).
+
+        Patterns are tried in order of preference. Returns None for an
+        unknown SDK surface.
+        """
+        # 1) If SDK exposes a `run_chat` method
+        if hasattr(self.sdk, "run_chat"):
+            fn, takes_messages = self.sdk.run_chat, True
+        # 2) If SDK Agent is callable: agent(query)
+        elif callable(self.sdk):
+            fn, takes_messages = self.sdk, False
+        # 3) If SDK exposes a generic `run` method
+        elif hasattr(self.sdk, "run"):
+            fn, takes_messages = self.sdk.run, False
+        else:
+            return None
+        is_async = inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
+        return fn, takes_messages, is_async
+
+    def looks_like_math(self, message: str) -> bool:
+        """Whether `message` is handled by the local math tool shortcut."""
+        return self._fallback._looks_like_math(message)
 
     async def run(self, message: str) -> Dict[str, Any]:
         """Run the agent on a user message. Returns dict {ok: bool, response/error}.
@@ -105,23 +153,12 @@ class StrandsAgent:
         orchestration. Otherwise it falls back to the simple agent logic.
         """
         # If MOCK_AGENT is requested, prefer the local fallback regardless
-        mock_flag = os.environ.get("MOCK_AGENT", "false").lower()
-        if mock_flag in ("1", "true", "yes"):
+        if self._mock:
             return await self._fallback.run(message)
 
         if self.available and self.sdk is not None:
             try:
-                # Try several common SDK invocation patterns in order of preference.
-                # 1) If SDK exposes a `run_chat` method
-                if hasattr(self.sdk, "run_chat"):
-                    resp = self.sdk.run_chat([{"role": "user", "content": message}])
-                # 2) If SDK Agent is callable: agent(query)
-                elif callable(self.sdk):
-                    resp = self.sdk(message)
-                # 3) If SDK exposes a generic `run` method
-                elif hasattr(self.sdk, "run"):
-                    resp = self.sdk.run(message)
-                else:
+                if self._sdk_entry is None:
                     # unknown surface, try stringifying sdk or delegate to fallback
                     logger.warning("Unknown Strands SDK surface, delegating to fallback or returning str(sdk)")
                     try:
@@ -129,15 +166,21 @@ class StrandsAgent:
                     except Exception:
                         return await self._fallback.run(message)
 
+                fn, takes_messages, is_async = self._sdk_entry
+                arg = [{"role": "user", "content": message}] if takes_messages else message
+                if is_async:
+                    resp = await fn(arg)
+                else:
+                    # Sync SDK calls may block on network I/O; run them in the
+                    # default threadpool so the event loop keeps serving requests.
+                    resp = await asyncio.to_thread(fn, arg)
+
+                # If sdk returned something awaitable, await it on the running loop
+                if inspect.isawaitable(resp):
+                    resp = await resp
                 # Normalize response
                 if isinstance(resp, dict) and "response" in resp:
                     return {"ok": True, "response": resp["response"]}
-                # If sdk returned something awaitable or async-like, attempt to await
-                if hasattr(resp, "__await__"):
-                    # run in event loop - if it's a coroutine
-                    import asyncio
-                    resolved = asyncio.get_event_loop().run_until_complete(resp)
-                    resp = resolved
                 return {"ok": True, "response": str(resp)}
             except Exception as e:
                 logger.exception("Strands SDK agent run failed")
@@ -145,3 +188,19 @@ class StrandsAgent:
 
         # fallback
         return await self._fallback.run(message)
+
+    async def stream(self, message: str) -> AsyncIterator[str]:
+        """Stream the reply to `message` as text chunks.
+
+        Only the fallback agent streams token by token; in mock mode or when
+        the SDK is in use the full reply is produced as a single chunk.
+        """
+        if self._mock or (self.available and self.sdk is not None):
+            result = await self.run(message)
+            if not result.get("ok"):
+                raise RuntimeError(result.get("error") or "agent error")
+            yield str(result.get("response"))
+            return
+
+        async for token in self._fallback.stream(message):
+            yield token
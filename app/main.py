@@ -7,33 +7,90 @@ Usage (after installing requirements):
 
 POST /chat
   JSON body: {"input": "Pergunte algo que pode precisar de cálculo, por exemplo: 'Qual é 12 * 7 + 3?'"}
+
+POST /chat/stream
+  Same body; the reply is streamed as server-sent events.
 """
-from fastapi import FastAPI, HTTPException, Response
+from typing import Annotated
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 import os
 import json
+import asyncio
+import httpx
+import msgspec
 from dotenv import load_dotenv
 
 from agent.strands_agent import StrandsAgent
-from pydantic import BaseModel
+from app.orjson_response import ORJSONResponse
+from app.semantic_cache import create_semantic_cache
+from util._json import dumps
 
-app = FastAPI(title="IA Chat Agent API")
+app = FastAPI(title="IA Chat Agent API", default_response_class=ORJSONResponse)
 
 
-class ChatRequest(BaseModel):
+# Request/response bodies are msgspec Structs: decoding, validation and
+# encoding happen in msgspec's C implementation instead of Pydantic.
+class ChatRequest(msgspec.Struct):
     message: str
 
 
-class ChatResponse(BaseModel):
+class ChatResponse(msgspec.Struct):
     response: str
 
 
+_chat_request_decoder = msgspec.json.Decoder(ChatRequest)
+_encoder = msgspec.json.Encoder()
+
+# FastAPI can't derive schemas from msgspec Structs, so document them explicitly
+_, _schemas = msgspec.json.schema_components([ChatRequest, ChatResponse])
+_CHAT_REQUEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _schemas["ChatRequest"]}},
+    }
+}
+_CHAT_OPENAPI = {
+    **_CHAT_REQUEST_OPENAPI,
+    "responses": {
+        "200": {
+            "description": "Successful Response",
+            "content": {"application/json": {"schema": _schemas["ChatResponse"]}},
+        }
+    },
+}
+
+
+async def chat_request(request: Request) -> ChatRequest:
+    """Decode and validate the JSON body as a `ChatRequest`."""
+    try:
+        return _chat_request_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:  # includes msgspec.ValidationError
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _chat_response(text: str) -> Response:
+    return Response(content=_encoder.encode(ChatResponse(response=text)), media_type="application/json")
+
+
 @app.on_event("startup")
 async def startup_event():
     # Load .env (if present) so env vars are available to the agent
     load_dotenv()
 
+    # Shared HTTP client: pooled keep-alive connections to the LLM backend
+    # instead of a new connection (and handshake) per call.
+    app.state.http = httpx.AsyncClient(
+        timeout=30,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        http2=True,
+    )
+
     # create a StrandsAgent (will fallback if SDK missing)
-    app.state.agent = StrandsAgent()
+    app.state.agent = StrandsAgent(client=app.state.http)
+
+    # optional semantic response cache (None when disabled)
+    app.state.semantic_cache = create_semantic_cache()
 
     # If MOCK_AGENT is set, monkeypatch the agent to simulate LLM responses
     mock_flag = os.getenv("MOCK_AGENT", "false").lower()
@@ -66,15 +123,67 @@ async def startup_event():
                 app.state.agent._call_llm = _fake_call
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(req: ChatRequest):
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.http.aclose()
+
+
+@app.post("/chat", openapi_extra=_CHAT_OPENAPI)
+async def chat(req: Annotated[ChatRequest, Depends(chat_request)]):
     agent = app.state.agent
+    cache = app.state.semantic_cache
+
+    # Serve repeated/paraphrased questions from the semantic cache. Math
+    # requests are evaluated locally and are cheap, so they skip the cache.
+    vec = None
+    if cache is not None and not agent.looks_like_math(req.message):
+        vec = await asyncio.to_thread(cache.embed, req.message)
+        cached = cache.lookup(vec)
+        if cached is not None:
+            return _chat_response(cached)
+
     # The StrandsAgent.run and fallback Agent.run expect a message string.
     result = await agent.run(req.message)
     if not result.get("ok"):
         # normalize error
         raise HTTPException(status_code=500, detail=result.get("error") or "agent error")
-    return {"response": result.get("response")}
+    # msgspec Structs don't validate on construction; enforce the documented
+    # `response: str` schema (models may answer with numbers or objects)
+    text = str(result.get("response"))
+    if vec is not None:
+        cache.insert(vec, text)
+    return _chat_response(text)
+
+
+@app.post("/chat/stream", openapi_extra=_CHAT_REQUEST_OPENAPI)
+async def chat_stream(req: Annotated[ChatRequest, Depends(chat_request)]):
+    """Stream the reply as server-sent events.
+
+    Each event is `data: {"response": "<chunk>"}`. The first chunk is
+    awaited before responding, so a failure up front (e.g. the LLM is
+    unreachable) is a plain 500 like on `/chat`; a failure mid-stream is
+    reported as an `error` event with `data: {"error": "..."}`.
+    """
+    agent = app.state.agent
+    chunks = agent.stream(req.message)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e) or "agent error")
+
+    async def events():
+        if first is None:
+            return
+        yield f"data: {dumps({'response': first})}\n\n"
+        try:
+            async for chunk in chunks:
+                yield f"data: {dumps({'response': chunk})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @app.get("/", tags=["health"])
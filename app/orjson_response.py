@@ -0,0 +1,16 @@
+"""JSON response class that serializes content with `orjson`.
+
+Used as the app's `default_response_class` so endpoint return values are
+encoded by orjson instead of the stdlib `json` module.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,97 @@
+"""Semantic cache for `/chat` responses.
+
+Queries are embedded with a sentence-transformers model and compared (cosine
+similarity) against previously answered queries. When a cached query is
+similar enough, its response is returned and the agent loop is skipped.
+
+The cache is optional: it is enabled with `SEMANTIC_CACHE=true` and requires
+the `sentence-transformers` package. If the package is not installed the API
+keeps working without a cache.
+"""
+from typing import Any, List, Optional
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Bounded in-memory cache of (query embedding, response) pairs.
+
+    Embeddings are L2-normalized, so the inner product is the cosine
+    similarity. When full, the least recently used entry is replaced.
+    """
+
+    def __init__(self, embedder: Any, max_size: int = 1024, threshold: float = 0.92):
+        # imported here so the API does not pay for numpy when the cache is off
+        import numpy as np
+
+        self._np = np
+        self.embedder = embedder
+        self.max_size = max_size
+        self.threshold = threshold
+        dim = embedder.get_sentence_embedding_dimension()
+        self._vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self._responses: List[Optional[str]] = [None] * max_size
+        # a use counter rather than a clock: timestamps can tie on coarse timers
+        self._last_used = np.zeros(max_size, dtype=np.int64)
+        self._tick = 0
+        self._size = 0
+
+    def _touch(self) -> int:
+        self._tick += 1
+        return self._tick
+
+    def embed(self, text: str) -> "numpy.ndarray":
+        """Return the normalized embedding of `text` (CPU-bound; run off the event loop)."""
+        vec = self.embedder.encode(text, normalize_embeddings=True, convert_to_numpy=True)
+        return vec.astype(self._np.float32, copy=False)
+
+    def lookup(self, vec: "numpy.ndarray") -> Optional[str]:
+        """Return the cached response most similar to `vec`, if above the threshold."""
+        if self._size == 0:
+            return None
+        scores = self._vectors[: self._size] @ vec
+        idx = int(self._np.argmax(scores))
+        if scores[idx] < self.threshold:
+            return None
+        self._last_used[idx] = self._touch()
+        return self._responses[idx]
+
+    def insert(self, vec: "numpy.ndarray", response: str) -> None:
+        if self._size < self.max_size:
+            idx = self._size
+            self._size += 1
+        else:
+            # evict the least recently used entry
+            idx = int(self._np.argmin(self._last_used))
+        self._vectors[idx] = vec
+        self._responses[idx] = response
+        self._last_used[idx] = self._touch()
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    """Build the cache from env vars, or return None if disabled/unavailable."""
+    flag = os.environ.get("SEMANTIC_CACHE", "false").lower()
+    if flag not in ("1", "true", "yes"):
+        return None
+    try:
+        # sentence-transformers pulls in PyTorch: only import it when enabled
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("SEMANTIC_CACHE is set but sentence-transformers is not installed — cache disabled")
+        return None
+
+    model_name = os.environ.get("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+    try:
+        embedder = SentenceTransformer(model_name)
+    except Exception as e:
+        logger.exception("Failed to load embedding model %s, cache disabled: %s", model_name, e)
+        return None
+
+    logger.info("Semantic cache enabled with model %s", model_name)
+    return SemanticCache(
+        embedder,
+        max_size=int(os.environ.get("SEMANTIC_CACHE_SIZE", 1024)),
+        threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.92)),
+    )
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import agent.agent as agent_module  # noqa: E402
+from agent.agent import Agent  # noqa: E402
+from util._json import dumps  # noqa: E402
+
+
+def test_dumps_falls_back_for_ints_beyond_64_bits():
+    assert json.loads(dumps({"result": 2**100})) == {"result": 2**100}
+
+
+def test_run_handles_tool_result_beyond_64_bits():
+    agent = Agent()
+
+    async def fake_call(messages):
+        for m in messages:
+            if m["role"] == "assistant":
+                parsed = json.loads(m["content"])
+                if "tool_result" in parsed:
+                    return json.dumps({"response": str(parsed["tool_result"]["result"])})
+        return json.dumps({"tool": {"name": "math", "input": "2**100"}})
+
+    agent._call_llm = fake_call
+    result = asyncio.run(agent.run("Qual é a resposta?"))
+    assert result == {"ok": True, "response": str(2**100)}
+
+
+def _probe(handler):
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        agent = Agent("http://llm", "m", client=client)
+        text = await agent._call_llm([{"role": "user", "content": "oi"}])
+        await client.aclose()
+        return text, agent._endpoint_cache
+
+    return asyncio.run(main())
+
+
+def test_cold_probe_skips_lower_priority_endpoints_when_first_answers():
+    called = []
+
+    async def handler(request):
+        called.append(request.url.path)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "chat"}}]})
+
+    assert _probe(handler) == ("chat", ("http://llm/v1/chat/completions", "openai_chat"))
+    assert called == ["/v1/chat/completions"]
+
+
+def test_cold_probe_falls_back_in_order_on_failure():
+    called = []
+
+    async def handler(request):
+        called.append(request.url.path)
+        if request.url.path == "/api/generate":
+            return httpx.Response(200, json={"output": "generate"})
+        return httpx.Response(404)
+
+    assert _probe(handler) == ("generate", ("http://llm/api/generate", "ollama_generate"))
+    assert called == ["/v1/chat/completions", "/v1/completions", "/chat", "/api/generate"]
+
+
+def test_cold_probe_hedge_prefers_endpoint_order_over_speed(monkeypatch):
+    monkeypatch.setattr(agent_module, "_PROBE_HEDGE_DELAY", 0.01)
+
+    async def handler(request):
+        if request.url.path == "/v1/chat/completions":
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, json={"choices": [{"message": {"content": "chat"}}]})
+        if request.url.path == "/v1/completions":
+            return httpx.Response(200, json={"choices": [{"text": "completion"}]})
+        return httpx.Response(404)
+
+    assert _probe(handler) == ("chat", ("http://llm/v1/chat/completions", "openai_chat"))
+
+
+def test_agent_without_client_is_reusable_across_event_loops():
+    # nothing listens on port 9: each call must fail with a connection
+    # error, not with a client bound to a previous (closed) event loop
+    agent = Agent("http://127.0.0.1:9", "m")
+    assert agent.client is None
+    for _ in range(2):
+        result = asyncio.run(agent.run("Qual é a capital da França?"))
+        assert result["ok"] is False
+        assert "Event loop is closed" not in result["error"]
+
+
+def test_looks_like_math_needs_a_digit_before_an_operator():
+    agent = Agent.__new__(Agent)
+    for text in ("2+2", " 3 *4", "(1+2)*3"):
+        assert agent._looks_like_math(text)
+    for text in ("8(*", "%4.", "^+5", "* 5"):
+        assert not agent._looks_like_math(text)
@@ -0,0 +1,87 @@
+import json
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.main as app_main  # noqa: E402
+
+
+def test_chat_coerces_non_string_response():
+    async def fake_run(message):
+        return {"ok": True, "response": 42}
+
+    with TestClient(app_main.app) as client:
+        app_main.app.state.agent.run = fake_run
+        resp = client.post("/chat", json={"message": "oi"})
+    assert resp.status_code == 200
+    assert resp.json() == {"response": "42"}
+
+
+def _sse_events(resp):
+    return [event for event in resp.text.split("\n\n") if event]
+
+
+def _mock_generate(lines, status_code=200):
+    async def handler(request):
+        assert request.url.path == "/api/generate"
+        return httpx.Response(status_code, content="\n".join(lines).encode())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_chat_stream_math_is_a_single_event():
+    with TestClient(app_main.app) as client:
+        resp = client.post("/chat/stream", json={"message": "2 + 2"})
+    assert resp.status_code == 200
+    assert _sse_events(resp) == ['data: {"response":"4"}']
+
+
+def test_chat_stream_relays_llm_chunks():
+    lines = [
+        json.dumps({"response": "Pa", "done": False}),
+        json.dumps({"response": "ris", "done": False}),
+        json.dumps({"response": "", "done": True}),
+    ]
+    with TestClient(app_main.app) as client:
+        app_main.app.state.agent._fallback.client = _mock_generate(lines)
+        resp = client.post("/chat/stream", json={"message": "Qual é a capital da França?"})
+    assert resp.status_code == 200
+    assert _sse_events(resp) == ['data: {"response":"Pa"}', 'data: {"response":"ris"}']
+
+
+def test_chat_stream_reports_mid_stream_error_as_event():
+    lines = [json.dumps({"response": "Pa", "done": False}), json.dumps({"error": "model crashed"})]
+    with TestClient(app_main.app) as client:
+        app_main.app.state.agent._fallback.client = _mock_generate(lines)
+        resp = client.post("/chat/stream", json={"message": "Qual é a capital da França?"})
+    assert resp.status_code == 200
+    assert _sse_events(resp) == [
+        'data: {"response":"Pa"}',
+        'event: error\ndata: {"error":"model crashed"}',
+    ]
+
+
+def test_chat_stream_fails_with_500_before_first_chunk():
+    with TestClient(app_main.app) as client:
+        app_main.app.state.agent._fallback.client = _mock_generate(["model not found"], status_code=404)
+        resp = client.post("/chat/stream", json={"message": "Qual é a capital da França?"})
+    assert resp.status_code == 500
+    assert "404" in resp.json()["detail"]
+
+
+def test_chat_rejects_non_string_message_with_422():
+    with TestClient(app_main.app) as client:
+        resp = client.post("/chat", json={"message": 5})
+    assert resp.status_code == 422
+    assert resp.json() == {"detail": "Expected `str`, got `int` - at `$.message`"}
+
+
+def test_chat_rejects_non_json_body_with_422():
+    with TestClient(app_main.app) as client:
+        resp = client.post("/chat", content=b"not json", headers={"Content-Type": "application/json"})
+    assert resp.status_code == 422
+    assert isinstance(resp.json()["detail"], str)
@@ -0,0 +1,46 @@
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tools.math_tool import evaluate_expression  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "__import__('os')",
+        "(1).real",
+        "sqrt(x=4)",
+        "sqrt(*[4])",
+        "pi(2)",
+        "(lambda: 1)()",
+        "[x for x in (1, 2)]",
+        "sum(x for x in (1, 2))",
+    ],
+)
+def test_rejects_expressions_outside_the_sandbox(expr):
+    result = evaluate_expression(expr)
+    assert result["ok"] is False
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("pi", math.pi),
+        ("sqrt(pi)", math.sqrt(math.pi)),
+        ("abs(-3)", 3),
+        ("hypot(3,4)", 5.0),
+    ],
+)
+def test_accepts_allowed_names_and_calls(expr, expected):
+    assert evaluate_expression(expr) == {"ok": True, "result": expected}
+
+
+def test_disallowed_operator_reports_the_operation():
+    result = evaluate_expression("~1")
+    assert result["ok"] is False
+    assert result["error"].startswith("Unsupported expression: UnaryOp(")
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.main as app_main  # noqa: E402
+from app.semantic_cache import SemanticCache  # noqa: E402
+
+
+class StubEmbedder:
+    """Maps known texts to fixed unit vectors, unknown texts to the last axis."""
+
+    VECTORS = {
+        "capital da frança": [1.0, 0.0, 0.0],
+        "qual a capital da frança?": [0.99, 0.141, 0.0],
+        "quem pintou a mona lisa?": [0.0, 1.0, 0.0],
+    }
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, text, normalize_embeddings=True, convert_to_numpy=True):
+        vec = np.array(self.VECTORS.get(text.lower(), [0.0, 0.0, 1.0]))
+        return vec / np.linalg.norm(vec)
+
+
+def test_lookup_hits_above_threshold():
+    cache = SemanticCache(StubEmbedder(), max_size=4, threshold=0.9)
+    cache.insert(cache.embed("Capital da França"), "Paris")
+    assert cache.lookup(cache.embed("Qual a capital da França?")) == "Paris"
+
+
+def test_lookup_misses_below_threshold():
+    cache = SemanticCache(StubEmbedder(), max_size=4, threshold=0.9)
+    cache.insert(cache.embed("Capital da França"), "Paris")
+    assert cache.lookup(cache.embed("Quem pintou a Mona Lisa?")) is None
+
+
+def test_insert_evicts_least_recently_used_when_full():
+    cache = SemanticCache(StubEmbedder(), max_size=2, threshold=0.9)
+    cache.insert(cache.embed("Capital da França"), "Paris")
+    cache.insert(cache.embed("Quem pintou a Mona Lisa?"), "Leonardo da Vinci")
+    # touching the first entry makes the second one the LRU
+    assert cache.lookup(cache.embed("Capital da França")) == "Paris"
+    cache.insert(cache.embed("outra pergunta"), "outra resposta")
+
+    assert cache.lookup(cache.embed("Quem pintou a Mona Lisa?")) is None
+    assert cache.lookup(cache.embed("Capital da França")) == "Paris"
+    assert cache.lookup(cache.embed("outra pergunta")) == "outra resposta"
+
+
+def test_chat_serves_cache_hit_without_running_agent():
+    calls = []
+
+    async def fake_run(message):
+        calls.append(message)
+        return {"ok": True, "response": "Paris"}
+
+    with TestClient(app_main.app) as client:
+        app_main.app.state.agent.run = fake_run
+        app_main.app.state.semantic_cache = SemanticCache(StubEmbedder(), max_size=4, threshold=0.9)
+        first = client.post("/chat", json={"message": "Capital da França"})
+        second = client.post("/chat", json={"message": "Qual a capital da França?"})
+
+    assert first.json() == {"response": "Paris"}
+    assert second.json() == {"response": "Paris"}
+    assert calls == ["Capital da França"]
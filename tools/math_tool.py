@@ -3,66 +3,95 @@
 This tool accepts a string expression like "2 + 2 * (3 - 1)" and returns
 the numeric result. It only allows numeric operators and safe functions
 from Python's `math` module.
+
+Expressions are parsed once, checked against an allow-list of AST node
+types and names, then compiled to a code object that is evaluated in a
+namespace containing only the allowed functions and constants.
 """
-from typing import Any
+from typing import Any, Tuple
+from types import CodeType
+from functools import lru_cache
 import ast
-import operator as op
 import math
 
-# supported operators map
-_operators = {
-    ast.Add: op.add,
-    ast.Sub: op.sub,
-    ast.Mult: op.mul,
-    ast.Div: op.truediv,
-    ast.Pow: op.pow,
-    ast.Mod: op.mod,
-    ast.USub: op.neg,
-    ast.UAdd: op.pos,
+# supported operators
+_ALLOWED_OPERATORS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.Mod,
+    ast.USub,
+    ast.UAdd,
+)
+
+_ALLOWED_NODE_TYPES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+) + _ALLOWED_OPERATORS
+
+_ALLOWED_FUNCS = {
+    name: getattr(math, name)
+    for name in (
+        "sin", "cos", "tan", "asin", "acos", "atan", "sqrt", "log", "log2",
+        "log10", "exp", "floor", "ceil", "pow", "fabs", "hypot",
+    )
 }
+# `abs` is not in `math` but is offered by the agent's expression extractor
+_ALLOWED_FUNCS["abs"] = abs
+
+_ALLOWED_CONSTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+# the only names visible to evaluated expressions
+_NAMESPACE = {**_ALLOWED_FUNCS, **_ALLOWED_CONSTS}
+_GLOBALS = {"__builtins__": {}}
+
+
+def _validate(tree: ast.AST) -> None:
+    """Raise ValueError unless every node in `tree` is allowed."""
+    # ast.walk visits a Call before its `func`, so call targets are known
+    # by the time their Name node is reached
+    call_targets = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODE_TYPES):
+            raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError("Only numeric constants are allowed")
+        # check operators here, so the error shows the whole operation
+        if isinstance(node, (ast.BinOp, ast.UnaryOp)) and not isinstance(node.op, _ALLOWED_OPERATORS):
+            raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+        # only allow simple names of allowed functions as call targets
+        if isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in _ALLOWED_FUNCS):
+                raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+            call_targets.add(id(node.func))
+        # any other name must be an allowed constant
+        if isinstance(node, ast.Name) and id(node) not in call_targets and node.id not in _ALLOWED_CONSTS:
+            raise ValueError(f"Unsupported expression: {ast.dump(node)}")
 
-_allowed_funcs = {k: getattr(math, k) for k in dir(math) if not k.startswith("_")}
-
-
-def _eval(node: ast.AST) -> Any:
-    if isinstance(node, ast.Expression):
-        return _eval(node.body)
-
-    # Support numeric literal nodes across Python versions. Newer Python
-    # versions may not expose `ast.Num` as a symbol, so build a safe tuple
-    # of constant node types to check at runtime.
-    number_node_types = (ast.Constant,)
-    if hasattr(ast, "Num"):
-        number_node_types = (ast.Num, ast.Constant)
-
-    if isinstance(node, number_node_types):
-        # ast.Num uses `n`; ast.Constant uses `value`
-        if hasattr(node, "n"):
-            val = node.n
-        else:
-            val = node.value
-        if isinstance(val, (int, float)):
-            return val
-        raise ValueError("Only numeric constants are allowed")
-    if isinstance(node, ast.BinOp):
-        left = _eval(node.left)
-        right = _eval(node.right)
-        op_type = type(node.op)
-        if op_type in _operators:
-            return _operators[op_type](left, right)
-    if isinstance(node, ast.UnaryOp):
-        operand = _eval(node.operand)
-        op_type = type(node.op)
-        if op_type in _operators:
-            return _operators[op_type](operand)
-    if isinstance(node, ast.Call):
-        # only allow simple names as functions
-        if isinstance(node.func, ast.Name):
-            func_name = node.func.id
-            if func_name in _allowed_funcs:
-                args = [_eval(a) for a in node.args]
-                return _allowed_funcs[func_name](*args)
-    raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+
+def _compile(expr: str) -> CodeType:
+    """Parse, validate and compile `expr`. The allow-list runs before compile."""
+    tree = ast.parse(expr, mode="eval")
+    _validate(tree)
+    return compile(tree, "<math>", "eval")
+
+
+# The result is a pure function of the input string, so repeated expressions
+# are memoized. Values are immutable tuples so cached entries can't be mutated.
+@lru_cache(maxsize=4096)
+def _evaluate(expr: str) -> Tuple[bool, Any]:
+    """Evaluate `expr`, returning (True, result) or (False, error message)."""
+    try:
+        return True, eval(_compile(expr), _GLOBALS, _NAMESPACE)
+    except Exception as e:
+        return False, str(e)
 
 
 def evaluate_expression(expr: str) -> dict:
@@ -70,12 +99,13 @@ def evaluate_expression(expr: str) -> dict:
 
     Returns: {"ok": True, "result": number} or {"ok": False, "error": "msg"}
     """
-    try:
-        parsed = ast.parse(expr, mode="eval")
-        result = _eval(parsed)
-        return {"ok": True, "result": result}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+    # e.g. a malformed tool call from the LLM
+    if not isinstance(expr, str):
+        return {"ok": False, "error": "Expression must be a string"}
+    ok, value = _evaluate(expr)
+    if ok:
+        return {"ok": True, "result": value}
+    return {"ok": False, "error": value}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+"""JSON helpers backed by `orjson` when available.
+
+`orjson` is considerably faster than the stdlib `json` module for both
+decoding and encoding. `dumps` always returns `str` so callers can use these
+helpers as drop-in replacements for `json.loads` / `json.dumps`. If `orjson`
+is not installed we fall back to the stdlib implementation.
+
+orjson only handles 64-bit integers: `dumps` falls back to the stdlib for
+larger ones, but `loads` reads them as floats and NaN/inf are encoded as
+`null`. Payloads carrying arbitrary Python numbers (e.g. math tool results)
+should use the stdlib `json` module directly.
+"""
+import json as _j
+
+try:
+    import orjson as _oj
+
+    loads = _oj.loads
+
+    def dumps(obj) -> str:
+        try:
+            return _oj.dumps(obj).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib encodes exactly
+            return _j.dumps(obj)
+
+except ImportError:  # pragma: no cover - depends on installed packages
+    loads = _j.loads
+    dumps = _j.dumps